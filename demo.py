@@ -1,97 +1,119 @@
 # demo.py
-import random
 import numpy as np
 import matplotlib.pyplot as plt
 from simple_env import SimpleNavigationEnv
 from reward_system import RewardTrace, RewardMgr
 
-np.random.seed(42)
-random.seed(42)
+rng = np.random.default_rng(42)
 
 # ---------- 参数 ----------
 N_EPISODE = 60
 EP_LEN    = 50
 
 # ---------- 工具 ----------
-def run_episode(env):
-    """返回 step_trace"""
-    trace = RewardTrace()
-    env.reset()
-    while True:
-        dx = np.random.uniform(-0.5, 0.5) + (env.target_x - env.x) * 0.1
-        dy = np.random.uniform(-0.5, 0.5) + (env.target_y - env.y) * 0.1
-        _, _, done = env.step([dx, dy], use_log_reward=True)
-        trace.push(env.calculate_reward())
-        if done:
-            break
-    return trace
+NAMES = ("base", "speed", "direction", "distance")
+
+
+def _mgr_from_components(comps):
+    """四个原始分量 -> RewardMgr"""
+    mgr = RewardMgr(fast_names=True)   # 固定 4 个名字，并行列表模式更省
+    for name, v in zip(NAMES, comps):
+        mgr.add_value(float(v), name=name)
+    return mgr
+
+
+def run_games(env, n_games, rng):
+    """SoA 批量跑 n_games 局：状态按 (n_games,) 数组存，整批一步更新。
+
+    返回 (最后一局的 step_trace, 本 episode 的 game_trace)。
+    """
+    # 批量 reset（与 env.reset 的分布一致）
+    x = rng.uniform(0, 2, n_games)
+    y = rng.uniform(0, 2, n_games)
+    speed = rng.uniform(0, env.max_speed, n_games)
+    dir_err = rng.uniform(-30, 30, n_games)
+    active = np.ones(n_games, dtype=bool)
+
+    comp_sum = np.zeros((n_games, 4))      # 每局的分量累积
+    n_steps = np.zeros(n_games)
+    last_game_steps = []                   # 最后一局的逐步分量
+
+    tx, ty = env.target_x, env.target_y
+    while active.any():
+        idx = np.flatnonzero(active)
+        dx = rng.uniform(-0.5, 0.5, idx.size) + (tx - x[idx]) * 0.1
+        dy = rng.uniform(-0.5, 0.5, idx.size) + (ty - y[idx]) * 0.1
+        x[idx] += dx * 0.1
+        y[idx] += dy * 0.1
+        speed[idx] = np.minimum(np.hypot(dx, dy), env.max_speed)
+        dir_err[idx] = np.clip(
+            dir_err[idx] + rng.uniform(-5, 5, idx.size), -30, 30)
+
+        # 批量奖励分量（与 calculate_reward 的 add_value 展开式一致）
+        dist = np.hypot(x[idx] - tx, y[idx] - ty)
+        closeness = 1.0 - dist / env._max_d
+        comps = np.empty((idx.size, 4))
+        comps[:, 0] = 500.0
+        comps[:, 1] = 1000.0 * (speed[idx] / env.max_speed) * 1.5
+        comps[:, 2] = -300.0 * (np.abs(dir_err[idx]) / 30.0) * 2.0
+        comps[:, 3] = 1000.0 * np.sqrt(closeness) * 2.0
+
+        comp_sum[idx] += comps
+        n_steps[idx] += 1
+        if active[-1]:                     # 末局还在跑：记录它这一步
+            last_game_steps.append(comps[-1])
+
+        done = (dist < 0.5) | (x[idx] > env.max_x) | (y[idx] > env.max_y)
+        active[idx[done]] = False
+
+    step_trace = RewardTrace()
+    for comps in last_game_steps:
+        step_trace.push(_mgr_from_components(comps))
+
+    game_trace = RewardTrace()
+    game_means = comp_sum / n_steps[:, None]
+    for comps in game_means:
+        game_trace.push(_mgr_from_components(comps))
+    return step_trace, game_trace
 
 # ---------- 训练 ----------
-env = SimpleNavigationEnv()
+env = SimpleNavigationEnv(seed=42)
 
 # 三级历史（仅末局/末 episode 保留）
 final_step_trace   = None   # 最后一局
 final_game_trace   = None   # 最后一个 episode 的 50 局
 episode_hist       = RewardTrace()   # 100 episode 最终历史
 
-game_trace = RewardTrace()
-
 for ep_idx in range(N_EPISODE):
-    game_trace.clear()  # 每 episode 清空 game 级
-    for game_idx in range(EP_LEN):
-        step_trace = run_episode(env)
-        game_mgr = step_trace.to_reward_mgr()
-
-        # 是否最后一局？
-        if ep_idx == N_EPISODE - 1 and game_idx == EP_LEN - 1:
-            final_step_trace = step_trace   # 保留最后一局
-        else:
-            step_trace.clear()              # 非末局立即清空
-
-        # 推入 game 级
-        game_trace.push(game_mgr)
+    step_trace, game_trace = run_games(env, EP_LEN, rng)
 
     # episode 压缩
-    ep_mgr = game_trace.to_reward_mgr()
+    episode_hist.push(game_trace.to_reward_mgr())
 
-    # 是否最后一个 episode？
+    # 末 episode 保留末局与 game 级轨迹
     if ep_idx == N_EPISODE - 1:
-        final_game_trace = game_trace       # 保留最后一个 episode
-    else:
-        game_trace.clear()                  # 非末 episode 立即清空
-
-    # 推入 episode 级
-    episode_hist.push(ep_mgr)
+        final_step_trace = step_trace
+        final_game_trace = game_trace
 
 # ---------- 绘图 ----------
 fig, axes = plt.subplots(1, 3, figsize=(18, 4))
 
-# (1) 最后一局 Step 奖励
-step_arrays = final_step_trace.arrays()
-axes[0].set_title("Step-Level Reward (Last Game)")
-for key in ["raw", "log", "base", "speed", "direction", "distance"]:
-    if key in step_arrays:
-        axes[0].plot(step_arrays[key], label=key)
-axes[0].set_xlabel("Step")
-axes[0].legend()
-
-# (2) 最后一个 episode 的 50 局奖励
-game_arrays = final_game_trace.arrays()
-axes[1].set_title("Game-Level Reward (Last Episode)")
-for key in ["raw", "log", "base", "speed", "direction", "distance"]:
-    if key in game_arrays:
-        axes[1].plot(game_arrays[key], label=key)
-axes[1].set_xlabel("Game")
-axes[1].legend()
-
-# (3) 训练全过程 60 episode 奖励
-ep_arrays = episode_hist.arrays()
-axes[2].set_title("Episode Reward (60 Episodes)")
-for key in ["raw", "log", "base", "speed", "direction", "distance"]:
-    if key in ep_arrays:
-        axes[2].plot(ep_arrays[key], label=key)
-axes[2].set_xlabel("Episode")
-axes[2].legend()
+PLOT_KEYS = ["raw", "log", "base", "speed", "direction", "distance"]
+panels = [
+    (final_step_trace, "Step-Level Reward (Last Game)", "Step"),      # 最后一局
+    (final_game_trace, "Game-Level Reward (Last Episode)", "Game"),   # 末 episode 的 50 局
+    (episode_hist, f"Episode Reward ({N_EPISODE} Episodes)", "Episode"),  # 训练全过程
+]
+
+for ax, (trace, title, xlabel) in zip(axes, panels):
+    arrays = trace.arrays()
+    xs = np.arange(len(trace))   # 显式 x 轴，每个子图只建一次
+    ax.set_title(title)
+    for key in PLOT_KEYS:
+        if key in arrays:
+            ax.plot(xs, arrays[key], label=key)
+    ax.set_xlabel(xlabel)
+    ax.legend()
 
 plt.tight_layout()
 plt.show()
@@ -1,9 +1,15 @@
 # reward_system.py
 from __future__ import annotations
 import math
-from collections import deque
+from math import copysign, log10   # 局部名查找比 math.xxx 属性访问快
 from typing import List, Dict, Optional
 
+import numpy as np
+
+# 常用 base 的幂表：省掉热路径里的 Python 级 pow
+_POW = {10: (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)}
+
+
 # ---------- 单条奖励 ----------
 class Reward:
     __slots__ = ("rank", "param", "base", "name", "_raw")
@@ -13,7 +19,11 @@ class Reward:
         self.param = param
         self.base = base
         self.name = name
-        self._raw = param * (base ** rank)
+        pows = _POW.get(base)
+        if pows is not None and rank < len(pows):
+            self._raw = param * pows[rank]
+        else:
+            self._raw = param * (base ** rank)
 
     @property
     def raw(self) -> float:
@@ -21,8 +31,16 @@ class Reward:
 
     @property
     def log(self) -> float:
-        sign = -1.0 if self._raw < 0 else 1.0
-        return sign * math.log(abs(self._raw) + 1, self.base)
+        absr = abs(self._raw)
+        if absr < 1e-9:
+            return 0.0
+        if self.base == 10:
+            return copysign(log10(absr + 1), self._raw)
+        return copysign(math.log(absr + 1, self.base), self._raw)
+
+    def __lt__(self, other: "Reward") -> bool:
+        # 元组比较走 CPython 的 C 级快路径，max()/min() 排序时更快
+        return (self.rank, self.param) < (other.rank, other.param)
 
     def __repr__(self) -> str:
         name_part = f"'{self.name}'" if self.name else ""
@@ -31,10 +49,22 @@ class Reward:
 
 # ---------- 单步奖励管理 ----------
 class RewardMgr:
-    def __init__(self, base: int = 10):
+    __slots__ = ("base", "_items", "_fast_names", "_name_keys", "_name_raws",
+                 "_names", "_raw_total", "_log_total")
+
+    def __init__(self, base: int = 10, fast_names: bool = False):
         self.base = base
         self._items: List[Reward] = []
-        self._names: Dict[str, Reward] = {}
+        self._fast_names = fast_names
+        if fast_names:
+            # 命名奖励很少（K<=8）时，并行列表 + 线性扫描比 dict 便宜
+            self._name_keys: List[str] = []
+            self._name_raws: List[float] = []
+        else:
+            self._names: Dict[str, Reward] = {}
+        # 增量累计，total_raw/total_log 变成 O(1) 读取
+        self._raw_total = 0.0
+        self._log_total = 0.0
 
     def add(
         self,
@@ -49,10 +79,18 @@ class RewardMgr:
             param *= (var / max_var) * mul
         r = Reward(rank, param, self.base, name)
         if name is not None:
-            if name in self._names:
-                raise ValueError(f"Reward name '{name}' already exists.")
-            self._names[name] = r
+            if self._fast_names:
+                if name in self._name_keys:
+                    raise ValueError(f"Reward name '{name}' already exists.")
+                self._name_keys.append(name)
+                self._name_raws.append(r._raw)
+            else:
+                if name in self._names:
+                    raise ValueError(f"Reward name '{name}' already exists.")
+                self._names[name] = r
         self._items.append(r)
+        self._raw_total += r._raw
+        self._log_total += r.log
         return self
 
     def add_value(
@@ -63,25 +101,41 @@ class RewardMgr:
         mul: float = 1.5,
         name: Optional[str] = None,
     ) -> RewardMgr:
-        if abs(value) < 1e-9:
+        absv = abs(value)
+        if absv < 1e-9:
             rank, param = 0, 0.0
         else:
-            rank = max(0, int(math.log10(abs(value) / self.base)) + 1)
-            param = value / (self.base ** rank)
+            # 注意 /base 再 +1 的分解语义要保持不变
+            rank = max(0, int(log10(absv / self.base)) + 1)
+            pows = _POW.get(self.base)
+            if pows is not None and rank < len(pows):
+                param = value / pows[rank]
+            else:
+                param = value / (self.base ** rank)
         return self.add(rank, param, var, max_var, mul, name)
 
     def total_raw(self) -> float:
-        return sum(r.raw for r in self._items)
+        return self._raw_total
 
     def total_log(self) -> float:
-        return sum(r.log for r in self._items)
+        # add() 增量维护，无需按条求和；条目多时也不必走
+        # np.copysign(np.log10(...)) 的批量路径
+        return self._log_total
 
     def __getitem__(self, name: str) -> float:
+        if self._fast_names:
+            return self._name_raws[self._name_keys.index(name)]
         return self._names[name].raw
 
     def clear(self) -> RewardMgr:
         self._items.clear()
-        self._names.clear()
+        if self._fast_names:
+            self._name_keys.clear()
+            self._name_raws.clear()
+        else:
+            self._names.clear()
+        self._raw_total = 0.0
+        self._log_total = 0.0
         return self
 
     def __len__(self) -> int:
@@ -92,52 +146,139 @@ class RewardMgr:
         return f"<RewardMgr {items} raw={self.total_raw():.1f} log={self.total_log():.3f}>"
 
 
+# ---------- 固定 4 分量管理器 ----------
+class FixedRewardMgr4:
+    """固定 base/speed/direction/distance 四分量的专用管理器。
+
+    SoA 形式：raws/logs 各一个长度 4 的数组，省掉通用 RewardMgr 的
+    Reward 对象、名字字典和查重开销。
+    """
+
+    __slots__ = ("raws", "logs")
+    NAMES = ("base", "speed", "direction", "distance")
+
+    def __init__(self):
+        self.raws = np.zeros(4)
+        self.logs = np.zeros(4)
+
+    def set(self, base: float, speed: float, direction: float, distance: float) -> FixedRewardMgr4:
+        r = self.raws
+        r[0] = base
+        r[1] = speed
+        r[2] = direction
+        r[3] = distance
+        l = self.logs
+        for i in range(4):
+            v = r[i]
+            l[i] = copysign(log10(abs(v) + 1), v)
+        return self
+
+    def total_raw(self) -> float:
+        return self.raws.sum()
+
+    def total_log(self) -> float:
+        return self.logs.sum()
+
+    def __getitem__(self, name: str) -> float:
+        return self.raws[self.NAMES.index(name)]
+
+    def __len__(self) -> int:
+        return 4
+
+    def __repr__(self) -> str:
+        items = ", ".join(f"'{k}'={v:.1f}" for k, v in zip(self.NAMES, self.raws))
+        return f"<FixedRewardMgr4 {items} raw={self.total_raw():.1f} log={self.total_log():.3f}>"
+
+
 # ---------- 训练历史 ----------
 class RewardTrace:
+    """按列（NumPy 数组）存储轨迹：raw / log / 各命名奖励各占一列，几何扩容。"""
+
+    __slots__ = ("_maxlen", "_cols", "_n", "_cap")
+
     def __init__(self, maxlen: Optional[int] = None):
-        self._buf = deque(maxlen=maxlen)
-
-    def push(self, mgr: RewardMgr) -> RewardTrace:
-        self._buf.append(
-            {
-                "raw": mgr.total_raw(),
-                "log": mgr.total_log(),
-                "named": {k: v.raw for k, v in mgr._names.items()},
-            }
-        )
+        self._maxlen = maxlen
+        self._cols: Dict[str, np.ndarray] = {}
+        self._n = 0
+        self._cap = 0
+
+    def _ensure_slot(self) -> None:
+        if self._n < self._cap:
+            return
+        if self._maxlen is not None and self._cap >= 2 * self._maxlen:
+            # 有界且余量充足：把最近 maxlen-1 条挪回开头，摊还 O(1)
+            # （代替旧实现每次 push 的整列左移）
+            keep = self._maxlen - 1
+            for col in self._cols.values():
+                col[:keep] = col[self._n - keep : self._n]
+                col[keep : self._n] = np.nan   # 腾出的尾部清回 NaN，防读到旧值
+            self._n = keep
+            return
+        new_cap = max(2 * self._cap, 16)
+        for key, col in self._cols.items():
+            new_col = np.full(new_cap, np.nan)
+            new_col[: self._n] = col[: self._n]
+            self._cols[key] = new_col
+        self._cap = new_cap
+
+    def _col(self, key: str) -> np.ndarray:
+        col = self._cols.get(key)
+        if col is None:
+            # 新名字：整列先填 NaN，缺失的历史步自然成为 NaN
+            col = np.full(self._cap, np.nan)
+            self._cols[key] = col
+        return col
+
+    def push(self, mgr) -> RewardTrace:
+        if self._maxlen == 0:   # deque(maxlen=0) 语义：什么都不存
+            return self
+        self._ensure_slot()
+        i = self._n
+        self._col("raw")[i] = mgr.total_raw()
+        self._col("log")[i] = mgr.total_log()
+        if isinstance(mgr, FixedRewardMgr4):
+            # 固定 schema：直接按位置写列，跳过名字字典
+            for k, v in zip(FixedRewardMgr4.NAMES, mgr.raws):
+                self._col(k)[i] = v
+        elif mgr._fast_names:
+            for k, v in zip(mgr._name_keys, mgr._name_raws):
+                self._col(k)[i] = v
+        else:
+            for k, v in mgr._names.items():
+                self._col(k)[i] = v._raw
+        self._n = i + 1
         return self
 
-    def arrays(self) -> Dict[str, list]:
-        if not self._buf:
+    def arrays(self) -> Dict[str, np.ndarray]:
+        n = len(self)
+        if not n:
             return {}
-        keys = self._buf[-1]["named"].keys()
-        return {
-            "raw": [r["raw"] for r in self._buf],
-            "log": [r["log"] for r in self._buf],
-            **{k: [r["named"].get(k, math.nan) for r in self._buf] for k in keys},
-        }
+        start = self._n - n
+        return {k: col[start : self._n] for k, col in self._cols.items()}
 
     def clear(self) -> RewardTrace:
-        self._buf.clear()
+        self._cols.clear()
+        self._n = 0
+        self._cap = 0
         return self
 
     def __len__(self) -> int:
-        return len(self._buf)
+        if self._maxlen is not None and self._n > self._maxlen:
+            return self._maxlen
+        return self._n
 
     # 新增：把轨迹压缩成 RewardMgr
     def to_reward_mgr(self, base: int = 10) -> RewardMgr:
         mgr = RewardMgr(base=base)
-        if not self._buf:
+        n = len(self)
+        if not n:
             return mgr
-        all_names = set()
-        for rec in self._buf:
-            all_names.update(rec["named"].keys())
-        n_steps = len(self._buf)
-        for name in all_names:
-            total = 0.0
-            for rec in self._buf:
-                total += rec["named"].get(name, 0.0)
-            mgr.add_value(total / n_steps, name=name)
+        start = self._n - n
+        for name, col in self._cols.items():
+            if name == "raw" or name == "log":
+                continue
+            # 缺失步是 NaN，按旧语义计 0 参与平均
+            mgr.add_value(np.nansum(col[start : self._n]) / n, name=name)
         return mgr
 
     # 链式压缩
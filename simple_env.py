@@ -1,61 +1,76 @@
 # simple_env.py
+from math import hypot   # 局部名查找比 math.hypot 属性访问快
+
 import numpy as np
-from reward_system import RewardMgr   # 替换旧 RewardManager
+from reward_system import FixedRewardMgr4   # 替换旧 RewardManager
+from reward_kernels import _compute_rewards
 
 
 class SimpleNavigationEnv:
-    def __init__(self):
+    def __init__(self, seed=None):
         self.max_x = 10.0
         self.max_y = 10.0
         self.max_speed = 5.0
         self.target_x = 8.0
         self.target_y = 8.0
+        self._max_d = hypot(self.max_x, self.max_y)
+        # Generator 比旧 np.random 全局单例调用开销小
+        self._rng = np.random.default_rng(seed)
+        self._state = np.empty(4)   # get_state 复用，避免每步新建 ndarray
         self.reset()
 
     def reset(self):
-        self.x = np.random.uniform(0, 2)
-        self.y = np.random.uniform(0, 2)
-        self.speed = np.random.uniform(0, self.max_speed)
-        self.direction_error = np.random.uniform(-30, 30)
+        # 一次抽 4 个随机数，再缩放到各自区间
+        u = self._rng.uniform(0, 1, 4)
+        self.x = u[0] * 2
+        self.y = u[1] * 2
+        self.speed = u[2] * self.max_speed
+        self.direction_error = u[3] * 60 - 30
+        self._last_rewards = None   # 状态变了，缓存失效
         return self.get_state()
 
     def get_state(self):
-        return np.array([self.x, self.y, self.speed, self.direction_error])
+        # 原地更新复用的数组；调用方如需保留快照请自行 copy()
+        s = self._state
+        s[0] = self.x
+        s[1] = self.y
+        s[2] = self.speed
+        s[3] = self.direction_error
+        return s
 
     def step(self, action, use_log_reward: bool = False):
         dx, dy = action
         self.x += dx * 0.1
         self.y += dy * 0.1
-        self.speed = min(np.linalg.norm([dx, dy]), self.max_speed)
-        self.direction_error += np.random.uniform(-5, 5)
-        self.direction_error = np.clip(self.direction_error, -30, 30)
+        self.speed = min(hypot(dx, dy), self.max_speed)
+        self.direction_error += self._rng.uniform(-5, 5)
+        # 标量 clamp，免去 np.clip 的 ufunc 调度
+        e = self.direction_error
+        self.direction_error = -30.0 if e < -30.0 else (30.0 if e > 30.0 else e)
 
-        mgr = self.calculate_reward()
-        reward = mgr.total_log() if use_log_reward else mgr.total_raw()
+        # 快路径：编译核只算标量，不建 RewardMgr；
+        # 结果缓存给 calculate_reward()，step 后取分量不用再算一遍
+        vals = _compute_rewards(self.x, self.y, self.speed, self.direction_error,
+                                self.target_x, self.target_y, self.max_speed,
+                                self.max_x, self.max_y)
+        self._last_rewards = vals
+        reward = vals[1] if use_log_reward else vals[0]
 
-        distance = np.linalg.norm([self.x - self.target_x, self.y - self.target_y])
+        distance = hypot(self.x - self.target_x, self.y - self.target_y)
         done = distance < 0.5 or self.x > self.max_x or self.y > self.max_y
         return self.get_state(), reward, done
 
-    def calculate_reward(self) -> RewardMgr:
-        mgr = RewardMgr(base=10)
-
-        mgr.add_value(500.0, name="base")          # 固定奖励
-
-        mgr.add_value(1000.0, var=self.speed,
-                      max_var=self.max_speed, mul=1.5, name="speed")
-
-        mgr.add_value(-300.0, var=abs(self.direction_error),
-                      max_var=30, mul=2.0, name="direction")
-
-        distance = np.linalg.norm([self.x - self.target_x, self.y - self.target_y])
-        max_d = np.linalg.norm([self.max_x, self.max_y])
-        closeness = 1.0 - (distance / max_d)
-        mgr.add_value(1000.0, var=closeness ** 0.5,
-                      max_var=1.0, mul=2.0, name="distance")
-        return mgr
+    def calculate_reward(self) -> FixedRewardMgr4:
+        # 四分量固定不变，用专用管理器 + 编译核代替通用 RewardMgr；
+        # step 刚算过就直接复用缓存
+        vals = self._last_rewards
+        if vals is None:
+            vals = _compute_rewards(self.x, self.y, self.speed, self.direction_error,
+                                    self.target_x, self.target_y, self.max_speed,
+                                    self.max_x, self.max_y)
+        return FixedRewardMgr4().set(vals[2], vals[3], vals[4], vals[5])
 
     def render_status(self):
-        d = np.linalg.norm([self.x - self.target_x, self.y - self.target_y])
+        d = hypot(self.x - self.target_x, self.y - self.target_y)
         print(f"Pos ({self.x:.2f}, {self.y:.2f}) | Spd {self.speed:.2f} | "
               f"DirErr {self.direction_error:5.1f}° | Dist {d:.2f}")